@@ -1,22 +1,33 @@
 # Configuração Simplificada - Sem Potenciômetros
 # ESP32 + MAX6675 + Display + Relé + LED
 
+from micropython import const
+
+# Valores inteiros usam const(); valores float não podem ser constantes.
+# Uso apenas documental: o MicroPython só substitui const() dentro do próprio
+# módulo, e o main.py recebe estes nomes por "import *" como globais comuns.
+
 # === CONFIGURAÇÕES DE HARDWARE ===
 
 # MAX6675 (Termopar)
-MAX6675_CS_PIN = 23    # Chip Select
-MAX6675_SO_PIN = 19    # Serial Output (MISO)
-MAX6675_SCK_PIN = 5    # Serial Clock
+MAX6675_CS_PIN = const(23)  # Chip Select
+MAX6675_SO_PIN = const(19)  # Serial Output (MISO)
+MAX6675_SCK_PIN = const(5)  # Serial Clock
+MAX6675_SPI_ID = const(1)   # Barramento SPI por hardware (HSPI)
+MAX6675_SPI_BAUDRATE = const(4_000_000)  # Clock SPI (Hz) - máx. 4.3 MHz
+MAX6675_HW_SPI = True       # False: ler o MAX6675 por GPIO (bit-bang)
 
 # Display OLED SSD1306
-OLED_SDA_PIN = 21      # I2C Data
-OLED_SCL_PIN = 22      # I2C Clock
-OLED_WIDTH = 128       # Largura do display
-OLED_HEIGHT = 64       # Altura do display
+OLED_SDA_PIN = const(21)                 # I2C Data
+OLED_SCL_PIN = const(22)                 # I2C Clock
+OLED_WIDTH = const(128)                  # Largura do display
+OLED_HEIGHT = const(64)                  # Altura do display
+OLED_I2C_FREQ = const(1_000_000)         # Clock I2C (Hz) - fast-mode plus
+OLED_I2C_FREQ_FALLBACK = const(400_000)  # Clock I2C de reserva (Hz)
 
 # Saídas Digitais
-RESISTENCIA_PIN = 18   # Controle do relé (forno)
-LED_CICLO_PIN = 4      # LED indicador de ciclo
+RESISTENCIA_PIN = const(18)  # Controle do relé (forno)
+LED_CICLO_PIN = const(4)     # LED indicador de ciclo
 
 # === CONFIGURAÇÕES DE CONTROLE ===
 
@@ -26,22 +37,24 @@ TEMP_MAX = 300.0       # Temperatura máxima (°C)
 TEMP_AMBIENTE = 25.0   # Temperatura ambiente padrão (°C)
 
 # Durações padrão (configuráveis via código)
-DURACAO_MIN = 30       # Duração mínima (segundos)
-DURACAO_MAX = 3600     # Duração máxima (segundos)
+DURACAO_MIN = const(30)    # Duração mínima (segundos)
+DURACAO_MAX = const(3600)  # Duração máxima (segundos)
 
 # Controle de Histerese
-HISTERESE = 2.0        # Margem de controle (°C)
-TEMP_FILTER_SIZE = 5   # Tamanho do filtro de média móvel
+HISTERESE = 2.0              # Margem de controle (°C)
+TEMP_FILTER_SIZE = const(5)  # Tamanho do filtro de média móvel
+TEMP_FILTER_MODE = "ewma"    # Filtro: "ewma" (exponencial), "mean" (média) ou "median" (mediana)
+EWMA_SHIFT = const(4)        # Peso da nova amostra no "ewma": 1/2^EWMA_SHIFT
 
 # Fases de Tratamento
-FASE1_TIMEOUT = 600    # Timeout para atingir temperatura (segundos)
-TEMP_TOLERANCE = 1.0   # Tolerância para considerar temperatura atingida (°C)
+FASE1_TIMEOUT = const(600)  # Timeout para atingir temperatura (segundos)
+TEMP_TOLERANCE = 1.0        # Tolerância para considerar temperatura atingida (°C)
 
 # === CONFIGURAÇÕES FIXAS PARA OPERAÇÃO MANUAL ===
 
 # Valores padrão que serão alterados via código
 DEFAULT_TARGET_TEMP = 100.0    # Temperatura padrão
-DEFAULT_DURATION = 300         # Duração padrão (5 minutos)
+DEFAULT_DURATION = const(300)  # Duração padrão (5 minutos)
 
 # === CONFIGURAÇÕES DE INTERFACE ===
 
@@ -49,26 +62,37 @@ DEFAULT_DURATION = 300         # Duração padrão (5 minutos)
 DEFAULT_CONTROL_MODE = "keyboard"
 
 # Intervalos de atualização
-DISPLAY_UPDATE_INTERVAL = 1.0      # Atualização do display (segundos)
-TEMP_READ_INTERVAL = 0.5           # Leitura de temperatura (segundos)
-LOG_INTERVAL = 10.0                # Intervalo de log (segundos)
+DISPLAY_UPDATE_INTERVAL_MS = const(1000)  # Atualização do display (ms)
+TEMP_READ_INTERVAL_MS = const(500)        # Leitura de temperatura (ms)
+TEMP_SAMPLE_PERIOD_MS = const(250)        # Amostragem do MAX6675 por timer (ms)
+TEMP_SAMPLE_TIMER_ID = const(0)           # Timer de hardware usado na amostragem
+LOG_INTERVAL = 10.0                       # Intervalo de log (segundos)
+DISPLAY_THREAD = True                     # Atualizar o display numa thread separada
 
 # === CONFIGURAÇÕES DE SEGURANÇA ===
 
 # Limites de segurança
 MAX_TEMP_SEGURANCA = 350.0     # Temperatura máxima absoluta (°C)
 TIMEOUT_SENSOR = 5.0           # Timeout para leitura do sensor (segundos)
-MAX_CICLOS_ERRO = 3            # Máximo de erros consecutivos
+MAX_CICLOS_ERRO = const(3)     # Máximo de erros consecutivos
 
 # === CONFIGURAÇÕES DE DEBUG ===
 
-DEBUG_MODE = True              # Ativar mensagens de debug
-VERBOSE_LOGGING = True         # Log detalhado
-PRINT_TEMPERATURE = True       # Imprimir temperatura no console
+# Flags inteiras (1 = ativo, 0 = inativo) declaradas com const()
+DEBUG_MODE = const(1)          # Ativar mensagens de debug
+VERBOSE_LOGGING = const(1)     # Log detalhado
+PRINT_TEMPERATURE = const(1)   # Imprimir temperatura no console
 
 # === CONFIGURAÇÕES DE ARQUIVOS ===
 
 LOG_FILENAME = "tratamentos_log.txt"
+LOG_FLUSH_LINES = const(6)     # Linhas de log entre gravações no flash
+
+# Formato do log: "csv" (uma linha a cada LOG_INTERVAL) ou "bin" (todas as
+# leituras, gravadas em blocos de SAMPLE_LOG_SIZE amostras)
+LOG_FORMAT = "csv"
+SAMPLE_LOG_FILENAME = "tratamentos_amostras.bin"
+SAMPLE_LOG_SIZE = const(360)   # Amostras por bloco (3 min a 0.5 s)
 
 # === CONFIGURAÇÕES ESPECÍFICAS PARA MÓDULO RELÉ ===
 
@@ -78,5 +102,5 @@ LOG_FILENAME = "tratamentos_log.txt"
 RELAY_ACTIVE_HIGH = True       # True se relé ativa com sinal alto
 
 # Configurações do segundo canal do relé (opcional)
-RELAY2_PIN = 19                # Segundo canal (se necessário)
+RELAY2_PIN = const(19)         # Segundo canal (se necessário)
 RELAY2_ENABLED = False         # Ativar segundo canal 
@@ -73,6 +73,11 @@ class SSD1306:
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
     def show(self):
+        self.show_pages(0, self.pages - 1)
+
+    def show_pages(self, start, end):
+        # Only push pages start..end (inclusive) of the frame buffer to the
+        # display, so partial updates don't resend the whole frame.
         x0 = 0
         x1 = self.width - 1
         if self.width == 64:
@@ -83,9 +88,9 @@ class SSD1306:
         self.write_cmd(x0)
         self.write_cmd(x1)
         self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_framebuf()
+        self.write_cmd(start)
+        self.write_cmd(end)
+        self.write_framebuf_pages(start, end)
 
     def fill(self, col):
         self.framebuf.fill(col)
@@ -99,6 +104,12 @@ class SSD1306:
     def text(self, string, x, y, col=1):
         self.framebuf.text(string, x, y, col)
 
+    def rect(self, x, y, w, h, col):
+        self.framebuf.rect(x, y, w, h, col)
+
+    def fill_rect(self, x, y, w, h, col):
+        self.framebuf.fill_rect(x, y, w, h, col)
+
 
 class SSD1306_I2C(SSD1306):
     def __init__(self, width, height, i2c, addr=0x3c, external_vcc=False):
@@ -112,6 +123,7 @@ class SSD1306_I2C(SSD1306):
         # buffer).
         self.buffer = bytearray(((height // 8) * width) + 1)
         self.buffer[0] = 0x40  # Set first byte of data buffer to Co=0, D/C=1
+        self.data_prefix = self.buffer[:1]
         self.framebuf = framebuf.FrameBuffer1(memoryview(self.buffer)[1:], width, height)
         super().__init__(width, height, external_vcc)
 
@@ -120,10 +132,12 @@ class SSD1306_I2C(SSD1306):
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
-    def write_framebuf(self):
-        # Blast out the frame buffer using a single I2C transaction to support
-        # hardware I2C interfaces.
-        self.i2c.writeto(self.addr, self.buffer)
+    def write_framebuf_pages(self, start, end):
+        # Send the control byte followed by the selected pages in a single
+        # I2C transaction, without copying them out of the frame buffer.
+        mv = memoryview(self.buffer)
+        self.i2c.writevto(self.addr, (self.data_prefix,
+                                      mv[1 + start * self.width:1 + (end + 1) * self.width]))
 
     def poweron(self):
         pass
@@ -151,12 +165,12 @@ class SSD1306_SPI(SSD1306):
         self.spi.write(bytearray([cmd]))
         self.cs.high()
 
-    def write_framebuf(self):
+    def write_framebuf_pages(self, start, end):
         self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs.high()
         self.dc.high()
         self.cs.low()
-        self.spi.write(self.buffer)
+        self.spi.write(memoryview(self.buffer)[start * self.width:(end + 1) * self.width])
         self.cs.high()
 
     def poweron(self):
@@ -2,7 +2,9 @@
 # ESP32 + MAX6675 + Display + Relé (SEM potenciômetros)
 
 import time
-from machine import Pin, I2C
+import array
+import micropython
+from machine import Pin, I2C, SPI, Timer
 import sys
 
 # Importar configurações simplificadas
@@ -16,12 +18,62 @@ except ImportError:
     DISPLAY_AVAILABLE = False
     print("Aviso: Display não disponível")
 
+try:
+    import _thread
+    THREAD_AVAILABLE = True
+except ImportError:
+    THREAD_AVAILABLE = False
+
+# Glifos de um caractere pré-alocados: permitem desenhar texto formatado
+# num bytearray sem criar strings a cada atualização do display
+_GLYPHS = tuple(chr(c) for c in range(128))
+
+# Sentinela de leitura inválida (NaN != NaN), mantém o retorno sempre float
+_NAN = float('nan')
+
+@micropython.viper
+def _decode(buf: ptr8) -> int:
+    """Decodificar o quadro do MAX6675: contagem bruta ou -1 se houver erro"""
+    r = (buf[0] << 8) | buf[1]
+    # D15 (bit fictício, sempre 0) e D2 (termopar aberto)
+    if r & 0x8004:
+        return -1
+    # D14..D3 em passos de 0.25°C
+    return r >> 3
+
+@micropython.viper
+def _ewma_step(acc: int, raw: int, shift: int) -> int:
+    """Passo da média exponencial inteira (acc em ponto fixo, -1 = vazio)"""
+    if acc < 0:
+        return raw << shift
+    # Termo de decaimento arredondado: erro simétrico em regime (EWMA_SHIFT >= 1)
+    return acc + raw - ((acc + (1 << (shift - 1))) >> shift)
+
+def _median5(a, b, c, d, e):
+    """Mediana de 5 valores por rede de comparação min/max (10 operações)"""
+    # Descartar o menor e o maior entre a, b, c, d
+    f = max(min(a, b), min(c, d))
+    g = min(max(a, b), max(c, d))
+    # A mediana é a mediana de (e, f, g)
+    return max(min(e, f), min(max(e, f), g))
+
 class SimpleFurnaceController:
     def __init__(self, target_temp=DEFAULT_TARGET_TEMP, duration=DEFAULT_DURATION):
         # Parâmetros configuráveis
-        self.target_temp = target_temp
+        self.set_target(target_temp)
         self.duration = duration
         
+        # Buffer de recepção do MAX6675 (pré-alocado, 16 bits)
+        self._rx_buf = bytearray(2)
+        
+        # Amostragem periódica por timer (leitura agendada fora da interrupção)
+        self._tmr = None
+        self._sensor_fault = False
+        self._do_read_ref = self._do_read
+        self.error_count = 0
+        self._last_sample_ms = time.ticks_ms()
+        self._sensor_timeout_ms = int(TIMEOUT_SENSOR * 1000)
+        
         # Inicializar hardware
         self.setup_hardware()
         
@@ -29,8 +81,61 @@ class SimpleFurnaceController:
         self.current_temp = TEMP_AMBIENTE
         self.heating_active = False
         self.cycle_active = False
-        self.temp_history = []
         self.max_temp_reached = 0.0
+        self._last_log = 0
+        self._logf = None
+        self._log_pending = 0
+        self._session_date = ""
+        self._session_sec = 0
+        self._session_ms = 0
+        
+        # Buffers de amostras do log binário (PV e estado do relé)
+        self._pv_ring = array.array('f', [0.0] * SAMPLE_LOG_SIZE)
+        self._heat_ring = bytearray(SAMPLE_LOG_SIZE)
+        self._sample_idx = 0
+        self._sample_phase = ""
+        self._sample_t0 = 0
+        self._sample_clock = ""
+        self._log_bin = LOG_FORMAT == "bin"  # Evita comparar strings a cada iteração
+        
+        # Cache do display: [título, PV, SP, aquecimento, T, R, máxima]
+        self._display_cache = [None] * 7
+        self._tmpbuf = bytearray(16)
+        
+        # Limite de atualização do display (começa liberado)
+        self._display_interval_ms = DISPLAY_UPDATE_INTERVAL_MS
+        self._last_display_ms = time.ticks_add(time.ticks_ms(), -self._display_interval_ms)
+        
+        # Estado compartilhado com a thread do display: [título, T, R]
+        self._display_state = ["", 0, 0]
+        self._display_lock = _thread.allocate_lock() if THREAD_AVAILABLE else None
+        self._display_running = False
+        self._display_stopped = True
+        self._dirty_first = 0
+        self._dirty_last = -1
+        
+        # Filtro de média móvel (buffer circular de contagens brutas com
+        # soma acumulada inteira)
+        self.temp_buf = array.array('H', [0] * TEMP_FILTER_SIZE)
+        self.temp_idx = 0
+        self.temp_count = 0
+        self.temp_sum = 0
+        
+        # Filtro exponencial (acumulador inteiro; -1 = sem amostras)
+        self._ewma_acc = -1
+        self._ewma_scale = 0.25 / (1 << EWMA_SHIFT)
+        
+        # Filtro escolhido uma única vez (evita comparar o modo a cada
+        # leitura): atualização inteira + conversão para °C sob demanda
+        if TEMP_FILTER_MODE == "ewma":
+            self._update_filter = self._update_ewma
+            self._filter_value = self._value_ewma
+        elif TEMP_FILTER_MODE == "median":
+            self._update_filter = self._update_ring
+            self._filter_value = self._value_median
+        else:
+            self._update_filter = self._update_ring
+            self._filter_value = self._value_mean
         
         print("=== CONTROLADOR DE FORNO SIMPLIFICADO ===")
         print(f"Temperatura alvo: {self.target_temp}°C")
@@ -38,162 +143,549 @@ class SimpleFurnaceController:
         
     def setup_hardware(self):
         """Configurar hardware básico"""
-        # MAX6675
+        # MAX6675 (SPI por hardware, CS controlado via GPIO)
         self.cs = Pin(MAX6675_CS_PIN, Pin.OUT)
-        self.so = Pin(MAX6675_SO_PIN, Pin.IN)
-        self.sck = Pin(MAX6675_SCK_PIN, Pin.OUT)
-        
-        # Estado inicial MAX6675
         self.cs.on()
-        self.sck.off()
+        self.spi = None
+        if MAX6675_HW_SPI:
+            try:
+                self.spi = SPI(MAX6675_SPI_ID, baudrate=MAX6675_SPI_BAUDRATE, polarity=0, phase=0,
+                               sck=Pin(MAX6675_SCK_PIN), miso=Pin(MAX6675_SO_PIN))
+                self._read_frame = self.spi.readinto
+            except (ValueError, OSError) as e:
+                print(f"✗ SPI por hardware indisponível: {e}")
+        
+        if self.spi is None:
+            # Leitura por GPIO (bit-bang) quando não há SPI por hardware
+            self.so = Pin(MAX6675_SO_PIN, Pin.IN)
+            self.sck = Pin(MAX6675_SCK_PIN, Pin.OUT)
+            self.sck.off()
+            self._read_frame = self._read_frame_soft
         
         # Controle do relé (forno)
+        self._active_level = 1 if RELAY_ACTIVE_HIGH else 0
         self.relay = Pin(RESISTENCIA_PIN, Pin.OUT)
-        self.relay.off()  # Iniciar desligado
+        self.relay.value(1 - self._active_level)  # Iniciar desligado
         
         # LED indicador
         self.led = Pin(LED_CICLO_PIN, Pin.OUT)
         self.led.off()
         
+        # Métodos pré-vinculados (evita buscas de atributo a cada chamada)
+        self._relay_value = self.relay.value
+        self._led_on = self.led.on
+        self._led_off = self.led.off
+        
         # Display OLED
+        self.display_ok = False
         if DISPLAY_AVAILABLE:
-            try:
-                i2c = I2C(0, scl=Pin(OLED_SCL_PIN), sda=Pin(OLED_SDA_PIN))
-                self.display = SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c)
-                self.display_ok = True
-                print("✓ Display OLED inicializado")
-            except Exception as e:
-                self.display_ok = False
-                print(f"✗ Erro no display: {e}")
-        else:
-            self.display_ok = False
+            # Tentar fast-mode plus; se o barramento não responder (pull-ups
+            # fracos), repetir na frequência padrão
+            for freq in (OLED_I2C_FREQ, OLED_I2C_FREQ_FALLBACK):
+                try:
+                    i2c = I2C(0, scl=Pin(OLED_SCL_PIN), sda=Pin(OLED_SDA_PIN), freq=freq)
+                    self.display = SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c)
+                    self.display_ok = True
+                    print(f"✓ Display OLED inicializado ({freq // 1000} kHz)")
+                    break
+                except Exception as e:
+                    print(f"✗ Erro no display a {freq // 1000} kHz: {e}")
         
         print("✓ Hardware configurado")
     
     def read_temperature(self):
         """Ler temperatura do MAX6675"""
+        if not self._sample():
+            return _NAN
+        return self.get_filtered_c()
+    
+    def _sample(self):
+        """Ler o MAX6675 e atualizar o filtro (apenas aritmética inteira)"""
+        # Ler 16 bits numa única transferência SPI
+        buf = self._rx_buf
+        self.cs.off()
         try:
-            # Protocolo SPI manual para MAX6675
-            self.cs.off()
-            time.sleep_us(1)
-            
-            # Ler 16 bits
-            raw_data = 0
-            for i in range(16):
-                self.sck.off()
-                time.sleep_us(1)
-                bit = self.so.value()
-                self.sck.on()
-                time.sleep_us(1)
-                raw_data = (raw_data << 1) | bit
-            
+            self._read_frame(buf)
+        except OSError as e:
+            self.error_count += 1
+            if DEBUG_MODE:
+                print(f"Erro na leitura: {e}")
+            return False
+        finally:
             self.cs.on()
-            
-            # Verificar erro
-            if raw_data & 0x4:
-                return None
-            
-            # Converter para temperatura
-            temp = (raw_data >> 3) * 0.25
-            
-            # Filtro de média móvel
-            self.temp_history.append(temp)
-            if len(self.temp_history) > TEMP_FILTER_SIZE:
-                self.temp_history.pop(0)
-            
-            filtered_temp = sum(self.temp_history) / len(self.temp_history)
-            self.current_temp = filtered_temp
-            
-            # Atualizar máxima
-            if filtered_temp > self.max_temp_reached:
-                self.max_temp_reached = filtered_temp
-            
-            return filtered_temp
-            
-        except Exception as e:
-            print(f"Erro na leitura: {e}")
-            return None
+        
+        # Contagem bruta (passos de 0.25°C) ou -1 se houver erro
+        raw = _decode(buf)
+        if raw < 0:
+            self.error_count += 1
+            if DEBUG_MODE:
+                print("Erro na leitura: termopar aberto ou dado inválido")
+            return False
+        self.error_count = 0
+        self._last_sample_ms = time.ticks_ms()
+        
+        self._update_filter(raw)
+        return True
+    
+    @micropython.native
+    def _read_frame_soft(self, buf):
+        """Ler os 16 bits do MAX6675 por GPIO, sem SPI por hardware"""
+        # Cada chamada Python já dura mais que os 100 ns mínimos de SCK
+        # alto/baixo do MAX6675, então não há pausas entre as bordas
+        so = self.so.value
+        sck_on = self.sck.on
+        sck_off = self.sck.off
+        raw = 0
+        for _ in range(16):
+            raw = (raw << 1) | so()
+            sck_on()
+            sck_off()
+        buf[0] = raw >> 8
+        buf[1] = raw & 0xff
+    
+    def get_filtered_c(self):
+        """Temperatura filtrada em °C (convertida apenas quando consultada)"""
+        filtered_temp = self._filter_value()
+        self.current_temp = filtered_temp
+        
+        # Atualizar máxima
+        if filtered_temp > self.max_temp_reached:
+            self.max_temp_reached = filtered_temp
+        
+        return filtered_temp
+    
+    def _update_ewma(self, raw):
+        """Média exponencial inteira sobre a contagem bruta"""
+        # O acumulador guarda contagem << EWMA_SHIFT (ponto fixo)
+        self._ewma_acc = _ewma_step(self._ewma_acc, raw, EWMA_SHIFT)
     
+    def _value_ewma(self):
+        """Valor do filtro exponencial em °C"""
+        return self._ewma_acc * self._ewma_scale
+    
+    def _update_ring(self, raw):
+        """Inserir amostra no buffer circular, atualizando a soma acumulada"""
+        temp_buf = self.temp_buf
+        idx = self.temp_idx
+        self.temp_sum += raw - temp_buf[idx]
+        temp_buf[idx] = raw
+        self.temp_idx = (idx + 1) % TEMP_FILTER_SIZE
+        if self.temp_count < TEMP_FILTER_SIZE:
+            self.temp_count += 1
+    
+    def _value_mean(self):
+        """Média móvel sem percorrer o histórico"""
+        return self.temp_sum * 0.25 / self.temp_count
+    
+    def _value_median(self):
+        """Mediana do buffer circular"""
+        temp_buf = self.temp_buf
+        count = self.temp_count
+        if count == 5 and TEMP_FILTER_SIZE == 5:
+            raw = _median5(temp_buf[0], temp_buf[1], temp_buf[2],
+                           temp_buf[3], temp_buf[4])
+        else:
+            raw = sorted(temp_buf[:count])[count // 2]
+        return raw * 0.25
+    
+    def _sample_isr(self, timer):
+        """Callback do timer: agendar a leitura fora do contexto de interrupção"""
+        try:
+            micropython.schedule(self._do_read_ref, 0)
+        except RuntimeError:
+            pass  # Fila de agendamento cheia: descartar esta amostra
+    
+    def _do_read(self, _):
+        """Leitura agendada pelo timer"""
+        if self._sensor_fault:
+            return  # Falha já sinalizada: mantida até o laço de controle ver
+        # Falhas isoladas mantêm o filtro com as últimas leituras válidas;
+        # só após MAX_CICLOS_ERRO erros consecutivos o ciclo é interrompido
+        if not self._sample() and self.error_count >= MAX_CICLOS_ERRO:
+            self._sensor_fault = True
+    
+    def start_sampling(self):
+        """Iniciar a leitura periódica do MAX6675 por timer"""
+        self.stop_sampling()
+        self._sensor_fault = not self._sample()
+        self._tmr = Timer(TEMP_SAMPLE_TIMER_ID)
+        self._tmr.init(period=TEMP_SAMPLE_PERIOD_MS, mode=Timer.PERIODIC,
+                       callback=self._sample_isr)
+    
+    def stop_sampling(self):
+        """Parar a leitura periódica"""
+        if self._tmr is not None:
+            self._tmr.deinit()
+            self._tmr = None
+    
+    def set_target(self, target):
+        """Definir temperatura alvo e pré-calcular as faixas de controle"""
+        self.target_temp = target
+        self._tgt_low = target - HISTERESE
+        self._tgt_high = target + HISTERESE
+        self._tol_low = target - TEMP_TOLERANCE
+        self._tol_high = target + TEMP_TOLERANCE
+    
+    def is_temperature_reached(self, temp):
+        """Verificar se a temperatura está dentro da tolerância do alvo"""
+        return self._tol_low <= temp <= self._tol_high
+    
+    @micropython.native
     def control_heating(self):
         """Controlar aquecimento com histerese"""
-        if self.current_temp is None:
-            self.relay.off()
+        temp = self.current_temp
+        level = self._active_level
+        
+        if temp != temp:
+            self._relay_value(1 - level)
             self.heating_active = False
             return False
         
         # Verificação de segurança
-        if self.current_temp > MAX_TEMP_SEGURANCA:
-            self.relay.off()
+        if temp > MAX_TEMP_SEGURANCA:
+            self._relay_value(1 - level)
             self.heating_active = False
-            print(f"⚠️ ALERTA: Temperatura de segurança excedida! {self.current_temp:.1f}°C")
+            print(f"⚠️ ALERTA: Temperatura de segurança excedida! {temp:.1f}°C")
             return False
         
-        # Controle com histerese
-        if self.current_temp < (self.target_temp - HISTERESE):
-            if RELAY_ACTIVE_HIGH:
-                self.relay.on()
-            else:
-                self.relay.off()
-            self.heating_active = True
-        elif self.current_temp > (self.target_temp + HISTERESE):
-            if RELAY_ACTIVE_HIGH:
-                self.relay.off()
-            else:
-                self.relay.on()
-            self.heating_active = False
+        # Controle com histerese: escrever o relé apenas nas transições
+        if temp < self._tgt_low:
+            if not self.heating_active:
+                self._relay_value(level)
+                self.heating_active = True
+        elif temp > self._tgt_high:
+            if self.heating_active:
+                self._relay_value(1 - level)
+                self.heating_active = False
         
         return True
     
+    def _clear_row(self, y):
+        """Limpar uma linha de texto e marcar as páginas afetadas"""
+        self.display.fill_rect(0, y, OLED_WIDTH, 8, 0)
+        first = y >> 3
+        last = (y + 7) >> 3
+        if first < self._dirty_first:
+            self._dirty_first = first
+        if last > self._dirty_last:
+            self._dirty_last = last
+    
+    def _fmt_int(self, buf, pos, val, width=1):
+        """Escrever inteiro não negativo em ASCII no buffer (com zeros à esquerda)"""
+        start = pos
+        while True:
+            buf[pos] = 48 + val % 10
+            val //= 10
+            pos += 1
+            if val == 0 and pos - start >= width:
+                break
+        # Dígitos foram gerados do menos significativo: inverter
+        i = start
+        j = pos - 1
+        while i < j:
+            buf[i], buf[j] = buf[j], buf[i]
+            i += 1
+            j -= 1
+        return pos
+    
+    def _fmt_temp(self, buf, val):
+        """Escrever temperatura em décimos de grau como "NNN.N" no buffer"""
+        pos = 0
+        if val < 0:
+            buf[0] = 45  # '-'
+            pos = 1
+            val = -val
+        pos = self._fmt_int(buf, pos, val // 10)
+        buf[pos] = 46  # '.'
+        buf[pos + 1] = 48 + val % 10
+        return pos + 2
+    
+    def _fmt_clock(self, buf, seconds):
+        """Escrever segundos como "MM:SS" no buffer"""
+        pos = self._fmt_int(buf, 0, seconds // 60, 2)
+        buf[pos] = 58  # ':'
+        return self._fmt_int(buf, pos + 1, seconds % 60, 2)
+    
+    def _draw_buf(self, n, x, y):
+        """Desenhar os n primeiros caracteres do buffer de texto"""
+        buf = self._tmpbuf
+        text = self.display.text
+        for i in range(n):
+            text(_GLYPHS[buf[i]], x + (i << 3), y)
+    
     def update_display(self, phase="", elapsed_time=0, remaining_time=0):
-        """Atualizar display OLED"""
+        """Atualizar display OLED (apenas as linhas alteradas)"""
         if not self.display_ok:
             return
         
+        # Respeitar DISPLAY_UPDATE_INTERVAL_MS mesmo se chamado a cada leitura
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self._last_display_ms) < self._display_interval_ms:
+            return
+        self._last_display_ms = now
+        
         try:
-            self.display.fill(0)
+            display = self.display
+            cache = self._display_cache
+            buf = self._tmpbuf
+            self._dirty_first = display.pages
+            self._dirty_last = -1
+            
+            # Primeiro desenho: limpar o conteúdo anterior da tela
+            if cache[0] is None:
+                display.fill(0)
+                self._dirty_first = 0
+                self._dirty_last = display.pages - 1
             
             # Título
-            if phase:
-                self.display.text(phase, 0, 0)
+            if phase != cache[0]:
+                cache[0] = phase
+                self._clear_row(0)
+                if phase:
+                    display.text(phase, 0, 0)
             
-            # Temperaturas
-            self.display.text(f"PV:{self.current_temp:.1f}C", 0, 15)
-            self.display.text(f"SP:{self.target_temp:.1f}C", 65, 15)
+            # Temperaturas (comparadas em décimos de grau)
+            pv = int(self.current_temp * 10 + 0.5)
+            sp = int(self.target_temp * 10 + 0.5)
+            if pv != cache[1] or sp != cache[2]:
+                cache[1] = pv
+                cache[2] = sp
+                self._clear_row(15)
+                display.text("PV:", 0, 15)
+                n = self._fmt_temp(buf, pv)
+                buf[n] = 67  # 'C'
+                self._draw_buf(n + 1, 24, 15)
+                display.text("SP:", 65, 15)
+                n = self._fmt_temp(buf, sp)
+                buf[n] = 67
+                self._draw_buf(n + 1, 89, 15)
             
             # Status aquecimento
-            status = "ON " if self.heating_active else "OFF"
-            self.display.text(f"Aquec:{status}", 0, 25)
-            
-            # Tempos
-            if elapsed_time > 0:
-                min_e = int(elapsed_time // 60)
-                sec_e = int(elapsed_time % 60)
-                self.display.text(f"T:{min_e:02d}:{sec_e:02d}", 0, 35)
+            heating = self.heating_active
+            if heating != cache[3]:
+                cache[3] = heating
+                self._clear_row(25)
+                display.text("Aquec:ON " if heating else "Aquec:OFF", 0, 25)
             
-            if remaining_time > 0:
-                min_r = int(remaining_time // 60)
-                sec_r = int(remaining_time % 60)
-                self.display.text(f"R:{min_r:02d}:{sec_r:02d}", 65, 35)
+            # Tempos (comparados em segundos inteiros)
+            t_elapsed = int(elapsed_time) if elapsed_time > 0 else -1
+            t_remaining = int(remaining_time) if remaining_time > 0 else -1
+            if t_elapsed != cache[4] or t_remaining != cache[5]:
+                cache[4] = t_elapsed
+                cache[5] = t_remaining
+                self._clear_row(35)
+                if t_elapsed >= 0:
+                    display.text("T:", 0, 35)
+                    self._draw_buf(self._fmt_clock(buf, t_elapsed), 16, 35)
+                if t_remaining >= 0:
+                    display.text("R:", 65, 35)
+                    self._draw_buf(self._fmt_clock(buf, t_remaining), 81, 35)
             
             # Temperatura máxima
-            self.display.text(f"Max:{self.max_temp_reached:.1f}C", 0, 50)
+            max_temp = int(self.max_temp_reached * 10 + 0.5)
+            if max_temp != cache[6]:
+                cache[6] = max_temp
+                self._clear_row(50)
+                display.text("Max:", 0, 50)
+                n = self._fmt_temp(buf, max_temp)
+                buf[n] = 67
+                self._draw_buf(n + 1, 32, 50)
             
-            self.display.show()
+            # Enviar apenas as páginas alteradas
+            if self._dirty_last >= 0:
+                display.show_pages(self._dirty_first, self._dirty_last)
             
         except Exception as e:
             print(f"Erro no display: {e}")
     
+    def _display_worker(self):
+        """Thread do display: redesenhar a partir do estado compartilhado"""
+        interval_ms = self._display_interval_ms
+        lock = self._display_lock
+        state = self._display_state
+        try:
+            while self._display_running:
+                lock.acquire()
+                title = state[0]
+                elapsed = state[1]
+                remaining = state[2]
+                lock.release()
+                
+                self.update_display(title, elapsed, remaining)
+                time.sleep_ms(interval_ms)
+        finally:
+            # Se a thread terminar por erro, o desenho volta ao laço principal
+            self._display_running = False
+            self._display_stopped = True
+    
+    def _start_display_thread(self):
+        """Iniciar a thread do display, se disponível"""
+        if not (DISPLAY_THREAD and THREAD_AVAILABLE and self.display_ok):
+            return
+        if self._display_running:
+            return
+        try:
+            self._display_running = True
+            self._display_stopped = False
+            _thread.start_new_thread(self._display_worker, ())
+        except Exception as e:
+            self._display_running = False
+            self._display_stopped = True
+            print(f"✗ Erro na thread do display: {e}")
+    
+    def _stop_display_thread(self):
+        """Parar a thread do display e aguardar o fim do desenho em curso"""
+        if self._display_stopped:
+            return
+        self._display_running = False
+        # Sem limite de espera: o display e o I2C não podem ser usados por
+        # duas threads ao mesmo tempo
+        while not self._display_stopped:
+            time.sleep_ms(10)
+    
+    def _publish_display(self, title, elapsed, remaining):
+        """Entregar o estado à thread do display (ou desenhar diretamente)"""
+        if not self._display_running:
+            self.update_display(title, elapsed, remaining)
+            return
+        lock = self._display_lock
+        state = self._display_state
+        lock.acquire()
+        state[0] = title
+        state[1] = elapsed
+        state[2] = remaining
+        lock.release()
+    
+    def _log_file(self):
+        """Arquivo de log do ciclo (aberto na primeira escrita)"""
+        if self._logf is None:
+            if LOG_FORMAT == "bin":
+                self._logf = open(SAMPLE_LOG_FILENAME, "ab")
+            else:
+                self._logf = open(LOG_FILENAME, "a")
+            self._log_pending = 0
+            self._start_log_session()
+        return self._logf
+    
+    def _start_log_session(self):
+        """Guardar data e hora de referência do log (uma leitura do RTC)"""
+        t = time.localtime()
+        self._session_date = f"{t[0]:04d}-{t[1]:02d}-{t[2]:02d} "
+        self._session_sec = t[3] * 3600 + t[4] * 60 + t[5]
+        self._session_ms = time.ticks_ms()
+    
+    def _log_timestamp(self):
+        """Data e hora atuais a partir da referência da sessão (sem ler o RTC)"""
+        day_sec = self._session_sec + time.ticks_diff(time.ticks_ms(), self._session_ms) // 1000
+        if day_sec >= 86400:
+            # Passou da meia-noite: renovar a data de referência
+            self._start_log_session()
+            day_sec = self._session_sec
+        return f"{self._session_date}{day_sec // 3600:02d}:{day_sec // 60 % 60:02d}:{day_sec % 60:02d}"
+    
     def log_data(self, phase, elapsed_time):
         """Registrar dados em arquivo"""
         try:
-            timestamp = time.localtime()
-            with open(LOG_FILENAME, "a") as f:
-                f.write(f"{timestamp[0]:04d}-{timestamp[1]:02d}-{timestamp[2]:02d} ")
-                f.write(f"{timestamp[3]:02d}:{timestamp[4]:02d}:{timestamp[5]:02d},")
-                f.write(f"{phase},{self.current_temp:.2f},{self.target_temp:.1f},")
-                f.write(f"{self.heating_active},{elapsed_time:.0f}\n")
+            # Arquivo mantido aberto durante o ciclo (fechado em stop_cycle)
+            f = self._log_file()
+            
+            f.write(self._log_timestamp())
+            f.write(f",{phase},{self.current_temp:.2f},{self.target_temp:.1f},")
+            f.write(f"{self.heating_active},{elapsed_time:.0f}\n")
+            
+            # Gravar no flash apenas a cada LOG_FLUSH_LINES linhas
+            self._log_pending += 1
+            if self._log_pending >= LOG_FLUSH_LINES:
+                f.flush()
+                self._log_pending = 0
+        except Exception as e:
+            print(f"Erro no log: {e}")
+    
+    def log_sample(self, phase, elapsed_time, temp):
+        """Guardar uma amostra nos buffers (gravados em bloco quando cheios)"""
+        i = self._sample_idx
+        if i and phase != self._sample_phase:
+            self.flush_samples()
+            i = 0
+        if i == 0:
+            self._sample_phase = phase
+            self._sample_t0 = elapsed_time
+            # Abrir o arquivo já no início do bloco inicia a referência de hora
+            self._log_file()
+            self._sample_clock = self._log_timestamp()
+        
+        self._pv_ring[i] = temp
+        self._heat_ring[i] = 1 if self.heating_active else 0
+        i += 1
+        self._sample_idx = i
+        
+        if i >= SAMPLE_LOG_SIZE:
+            self.flush_samples()
+    
+    def flush_samples(self):
+        """Gravar o bloco de amostras pendente no arquivo binário"""
+        n = self._sample_idx
+        if n == 0:
+            return
+        self._sample_idx = 0
+        try:
+            # Bloco: cabeçalho CSV "#data hora,fase,alvo,n,t0" seguido de
+            # n PV (float32) e n estados de aquecimento (1 byte cada)
+            f = self._log_file()
+            f.write(f"#{self._sample_clock},{self._sample_phase},{self.target_temp:.1f},{n},{self._sample_t0:.1f}\n".encode())
+            f.write(memoryview(self._pv_ring)[:n])
+            f.write(memoryview(self._heat_ring)[:n])
+            f.flush()
+        except Exception as e:
+            print(f"Erro no log: {e}")
+    
+    def close_log(self):
+        """Fechar o arquivo de log, gravando as linhas pendentes"""
+        self.flush_samples()
+        if self._logf is None:
+            return
+        try:
+            self._logf.close()
         except Exception as e:
             print(f"Erro no log: {e}")
+        self._logf = None
+    
+    @micropython.native
+    def _phase_step(self, phase_name, title, elapsed, remaining=None):
+        """Executar uma iteração de fase: leitura, controle, status e log"""
+        # Valor filtrado a partir das amostras feitas pelo timer; amostra
+        # mais antiga que TIMEOUT_SENSOR indica que o timer parou de ler
+        if time.ticks_diff(time.ticks_ms(), self._last_sample_ms) > self._sensor_timeout_ms:
+            self._sensor_fault = True
+        if self._sensor_fault:
+            print("Erro na leitura do sensor!")
+            return _NAN
+        temp = self.get_filtered_c()
+        
+        # Controlar aquecimento
+        if not self.control_heating():
+            return _NAN
+        
+        # Mostrar status
+        if PRINT_TEMPERATURE:
+            status = "AQUECENDO" if self.heating_active else "MANTENDO"
+            target = self.target_temp
+            if remaining is None:
+                print(f"T:{temp:.1f}°C | Alvo:{target:.1f}°C | {status} | {elapsed:.0f}s")
+            else:
+                print(f"T:{temp:.1f}°C | Alvo:{target:.1f}°C | {status} | Restam:{remaining:.0f}s")
+        
+        # Atualizar display
+        self._publish_display(title, elapsed, remaining or 0)
+        
+        # Registro: todas as amostras em blocos binários ou CSV periódico
+        if self._log_bin:
+            self.log_sample(phase_name, elapsed, temp)
+        elif elapsed - self._last_log >= LOG_INTERVAL:
+            self.log_data(phase_name, elapsed)
+            self._last_log = elapsed
+        
+        return temp
     
     def run_cycle(self):
         """Executar ciclo completo de tratamento"""
@@ -204,45 +696,27 @@ class SimpleFurnaceController:
         
         # Inicializar ciclo
         self.cycle_active = True
-        self.led.on()
+        self._led_on()
         self.max_temp_reached = 0.0
+        self.start_sampling()
+        self._start_display_thread()
+        interval_ms = TEMP_READ_INTERVAL_MS
         
         try:
             # FASE 1: Aquecimento
             print("--- FASE 1: AQUECIMENTO ---")
-            phase1_start = time.time()
-            last_log = 0
+            phase1_start = time.ticks_ms()
+            self._last_log = 0
             
             while True:
-                current_time = time.time()
-                elapsed = current_time - phase1_start
+                elapsed = time.ticks_diff(time.ticks_ms(), phase1_start) / 1000
                 
-                # Ler temperatura
-                temp = self.read_temperature()
-                if temp is None:
-                    print("Erro na leitura do sensor!")
+                temp = self._phase_step("FASE1", "FASE 1 - AQUEC", elapsed)
+                if temp != temp:
                     break
                 
-                # Controlar aquecimento
-                control_ok = self.control_heating()
-                if not control_ok:
-                    break
-                
-                # Mostrar status
-                if PRINT_TEMPERATURE:
-                    status = "AQUECENDO" if self.heating_active else "MANTENDO"
-                    print(f"T:{temp:.1f}°C | Alvo:{self.target_temp:.1f}°C | {status} | {elapsed:.0f}s")
-                
-                # Atualizar display
-                self.update_display("FASE 1 - AQUEC", elapsed)
-                
-                # Log periódico
-                if elapsed - last_log >= LOG_INTERVAL:
-                    self.log_data("FASE1", elapsed)
-                    last_log = elapsed
-                
                 # Verificar se atingiu temperatura
-                if abs(temp - self.target_temp) <= TEMP_TOLERANCE:
+                if self.is_temperature_reached(temp):
                     print(f"✓ Temperatura atingida: {temp:.1f}°C")
                     break
                 
@@ -251,47 +725,26 @@ class SimpleFurnaceController:
                     print("⚠️ Timeout na Fase 1 - não conseguiu atingir temperatura")
                     break
                 
-                time.sleep(TEMP_READ_INTERVAL)
+                time.sleep_ms(interval_ms)
             
             # FASE 2: Tratamento
             print("\n--- FASE 2: TRATAMENTO ---")
-            phase2_start = time.time()
-            last_log = 0
+            phase2_start = time.ticks_ms()
+            self._last_log = 0
             
             while True:
-                current_time = time.time()
-                elapsed = current_time - phase2_start
+                elapsed = time.ticks_diff(time.ticks_ms(), phase2_start) / 1000
                 remaining = self.duration - elapsed
                 
                 if elapsed >= self.duration:
                     print("✓ Tratamento concluído!")
                     break
                 
-                # Ler temperatura
-                temp = self.read_temperature()
-                if temp is None:
-                    print("Erro na leitura do sensor!")
-                    break
-                
-                # Controlar aquecimento
-                control_ok = self.control_heating()
-                if not control_ok:
+                temp = self._phase_step("FASE2", "FASE 2 - TRAT", elapsed, remaining)
+                if temp != temp:
                     break
                 
-                # Mostrar status
-                if PRINT_TEMPERATURE:
-                    status = "AQUECENDO" if self.heating_active else "MANTENDO"
-                    print(f"T:{temp:.1f}°C | Alvo:{self.target_temp:.1f}°C | {status} | Restam:{remaining:.0f}s")
-                
-                # Atualizar display
-                self.update_display("FASE 2 - TRAT", elapsed, remaining)
-                
-                # Log periódico
-                if elapsed - last_log >= LOG_INTERVAL:
-                    self.log_data("FASE2", elapsed)
-                    last_log = elapsed
-                
-                time.sleep(TEMP_READ_INTERVAL)
+                time.sleep_ms(interval_ms)
             
         except KeyboardInterrupt:
             print("\n🛑 Ciclo interrompido pelo usuário")
@@ -306,10 +759,13 @@ class SimpleFurnaceController:
         print("\n=== FINALIZANDO CICLO ===")
         
         # Desligar tudo
-        self.relay.off()
-        self.led.off()
+        self.stop_sampling()
+        self._relay_value(1 - self._active_level)
+        self._led_off()
         self.heating_active = False
         self.cycle_active = False
+        self.close_log()
+        self._stop_display_thread()
         
         # Relatório final
         print(f"Temperatura máxima atingida: {self.max_temp_reached:.1f}°C")
@@ -323,6 +779,7 @@ class SimpleFurnaceController:
                 self.display.text(f"Max:{self.max_temp_reached:.1f}C", 0, 20)
                 self.display.text(f"Final:{self.current_temp:.1f}C", 0, 35)
                 self.display.show()
+                self._display_cache = [None] * 7
             except:
                 pass
         
@@ -383,7 +840,7 @@ def interactive_menu():
         
         for i in range(10):
             temp = furnace.read_temperature()
-            if temp:
+            if temp == temp:
                 print(f"Leitura {i+1}: {temp:.2f}°C")
             else:
                 print(f"Leitura {i+1}: ERRO")
@@ -0,0 +1,12 @@
+# Manifesto de módulos congelados (firmware MicroPython para ESP32)
+# Uso: make BOARD=ESP32_GENERIC FROZEN_MANIFEST=/caminho/para/src/manifest.py
+
+include("$(PORT_DIR)/boards/manifest.py")
+
+# opt=3: remove asserts e números de linha do bytecode congelado
+
+# Configurações: bytecode e constantes ficam no flash, não no heap
+module("config.py", opt=3)
+
+# Driver do display OLED (importado como libs.ssd1306)
+module("libs/ssd1306.py", opt=3)